@@ -1,7 +1,20 @@
-from flask import Flask, render_template, request, jsonify
+import os
+import orjson
+from flask import Flask, request
 from signin import run_signin
 
 app = Flask(__name__)
+_index_template = None
+
+def get_index_template():
+    """
+    缓存首页模板对象，避免每次请求都经过 render_template 的加载器查找；
+    调试模式下每次重新获取，以便模板修改后即时生效
+    """
+    global _index_template
+    if _index_template is None or app.debug:
+        _index_template = app.jinja_env.get_template("index.html")
+    return _index_template
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -11,13 +24,15 @@ def index():
         verbose = request.form.get("verbose") == "on"
         
         if username and password:
-            result = run_signin(username, password, verbose)
+            # 网页版是常驻进程，首页可以用条件请求复用上次解析的用户信息
+            result = run_signin(username, password, verbose, revalidate_home=True)
             # 检查是否是 AJAX 请求（自动签到）
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or request.headers.get('Content-Type') == 'application/x-www-form-urlencoded':
-                return jsonify(result)
-            return render_template("index.html", result=result)
+                return app.response_class(orjson.dumps(result), mimetype="application/json")
+            return get_index_template().render(result=result)
     
-    return render_template("index.html", result=None)
+    return get_index_template().render(result=None)
 
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=5000)
+    # 开发用服务器；生产环境请使用 gunicorn 多线程 worker，见 README
+    app.run(debug=os.environ.get("FLASK_DEBUG") == "1", host="0.0.0.0", port=5000, threaded=True)
@@ -3,90 +3,73 @@
 Auto sign in to NUEDC training website for multiple accounts.
 """
 
-import json
+import logging
 import os
 import sys
-from signin import run_signin
+import orjson
+from signin import run_signin_batch
+
+logging.basicConfig(
+    level=os.environ.get('LOGLEVEL', 'INFO').upper(),
+    format='%(levelname)s %(message)s',
+    stream=sys.stdout,
+)
+logger = logging.getLogger('signin')
 
 def main():
-    print('Starting auto signin process...')
-    print(f'Current directory: {os.getcwd()}')
-    print(f'Files in current directory: {os.listdir(".")}')
+    logger.info('Starting auto signin process...')
     
     # Get accounts from environment variable
     accounts_json = os.environ.get('NUEDC_ACCOUNTS')
     if not accounts_json:
-        print('Error: NUEDC_ACCOUNTS environment variable not set')
+        logger.error('NUEDC_ACCOUNTS environment variable not set')
         return
     
-    # Check if notify.py exists
-    if os.path.exists('notify.py'):
-        print('notify.py file found')
-    else:
-        print('ERROR: notify.py file not found!')
-    
     signin_results = {}
     
     try:
-        accounts = json.loads(accounts_json)
-        print(f'Found {len(accounts)} accounts')
+        accounts = orjson.loads(accounts_json)
+        logger.info('Found %d accounts', len(accounts))
         
-        for account in accounts:
+        credentials = []
+        for index, account in enumerate(accounts):
             username = account.get('username')
             password = account.get('password')
             
             if not username or not password:
-                print(f'Skipping invalid account: {account}')
+                logger.warning('Skipping invalid account #%d (missing username or password)', index)
                 continue
             
-            print(f'\nSigning in for: {username}')
-            try:
-                result = run_signin(username, password, True)
-                print(f'Signin result: {result}')
-                signin_results[username] = result
-            except Exception as e:
-                error_result = {
-                    "success": False,
-                    "error": str(e)
-                }
-                print(f'Error signing in for {username}: {str(e)}')
-                signin_results[username] = error_result
+            credentials.append((username, password))
+        
+        logger.info('Signing in for %d accounts concurrently', len(credentials))
+        results = run_signin_batch(credentials, verbose=logger.isEnabledFor(logging.DEBUG))
+        
+        for (username, _), result in zip(credentials, results):
+            logger.info('%s: %s', username, result.get('message'))
+            logger.debug('Signin result for %s: %s', username, result)
+            signin_results[username] = result
         
         # Send notification
         if signin_results:
-            print('\nPreparing to send notification...')
-            print(f'Number of signin results: {len(signin_results)}')
+            logger.info('Sending notification for %d results', len(signin_results))
             
-            # Try to import notify module
             try:
-                # Add current directory to path
-                sys.path.insert(0, '.')
-                print(f'System path: {sys.path}')
-                
+                # Make notify.py importable when run from another directory
+                sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
                 import notify
-                print('Successfully imported notify module')
-                
-                # Test notification function
-                print('Calling send_notification function...')
                 notify.send_notification(signin_results)
-                print('Notification function called successfully')
-            except ImportError as e:
-                print(f'Error importing notify module: {str(e)}')
-                import traceback
-                traceback.print_exc()
-            except Exception as e:
-                print(f'Error sending notification: {str(e)}')
-                import traceback
-                traceback.print_exc()
+            except ImportError:
+                logger.exception('Error importing notify module')
+            except Exception:
+                logger.exception('Error sending notification')
         else:
-            print('No signin results to send notification for')
+            logger.info('No signin results to send notification for')
                 
-    except json.JSONDecodeError as e:
-        print(f'Error parsing NUEDC_ACCOUNTS: {str(e)}')
-    except Exception as e:
-        print(f'Unexpected error: {str(e)}')
-        import traceback
-        traceback.print_exc()
+    except orjson.JSONDecodeError as e:
+        logger.error('Error parsing NUEDC_ACCOUNTS: %s', e)
+    except Exception:
+        logger.exception('Unexpected error')
 
 if __name__ == '__main__':
     main()
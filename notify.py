@@ -4,12 +4,23 @@ Send notification about signin results to Feishu or other platforms.
 """
 
 import os
-import json
-import requests
+import smtplib
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+import orjson
+import urllib3
 
-def send_feishu_notification(webhook, title, content):
+# Shared pool so repeated webhook calls reuse the same TLS connection
+_POOL = urllib3.PoolManager(num_pools=2, maxsize=8, retries=False)
+_WEBHOOK_TIMEOUT = urllib3.Timeout(connect=3, read=10)
+
+# Static part of the Feishu card, shared by every payload (never mutated)
+_FEISHU_CARD_CONFIG = {"wide_screen_mode": True}
+
+def send_feishu_notification(webhook, title, sections):
     """
     Send notification to Feishu (Lark) using webhook.
+    All sections are batched into a single card, one markdown element each.
     """
     if not webhook:
         print('Feishu webhook not set, skipping notification')
@@ -19,9 +30,7 @@ def send_feishu_notification(webhook, title, content):
         payload = {
             "msg_type": "interactive",
             "card": {
-                "config": {
-                    "wide_screen_mode": True
-                },
+                "config": _FEISHU_CARD_CONFIG,
                 "header": {
                     "title": {
                         "tag": "plain_text",
@@ -30,39 +39,35 @@ def send_feishu_notification(webhook, title, content):
                     "template": "blue"
                 },
                 "elements": [
-                    {
-                        "tag": "markdown",
-                        "content": content
-                    }
+                    {"tag": "markdown", "content": section}
+                    for section in sections
                 ]
             }
         }
         
-        response = requests.post(
+        response = _POOL.request(
+            "POST",
             webhook,
-            json=payload,
+            body=orjson.dumps(payload),
             headers={"Content-Type": "application/json"},
-            timeout=10
+            timeout=_WEBHOOK_TIMEOUT
         )
         
-        if response.status_code == 200:
+        if response.status == 200:
             print('Feishu notification sent successfully')
             return True
         else:
-            print(f'Failed to send Feishu notification: {response.text}')
+            print(f'Failed to send Feishu notification: {response.data.decode("utf-8", "replace")}')
             return False
     except Exception as e:
         print(f'Error sending Feishu notification: {str(e)}')
         return False
 
-def send_email_notification(to_email, subject, content):
+def open_smtp_connection():
     """
-    Send notification via email.
+    Open an authenticated SMTP connection using environment configuration.
+    Returns None when email is not configured.
     """
-    import smtplib
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
-    
     # Get email configuration from environment variables
     smtp_server = os.environ.get('SMTP_SERVER')
     smtp_port = os.environ.get('SMTP_PORT', 587)
@@ -72,7 +77,22 @@ def send_email_notification(to_email, subject, content):
     
     if not all([smtp_server, smtp_username, smtp_password, from_email]):
         print('Email configuration not set, skipping notification')
-        return False
+        return None
+    
+    server = smtplib.SMTP(smtp_server, smtp_port)
+    try:
+        server.starttls()
+        server.login(smtp_username, smtp_password)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+def send_email_notification(server, to_email, subject, content):
+    """
+    Send notification via email over an already opened SMTP connection.
+    """
+    from_email = os.environ.get('FROM_EMAIL', os.environ.get('SMTP_USERNAME'))
     
     try:
         msg = MIMEMultipart()
@@ -82,10 +102,7 @@ def send_email_notification(to_email, subject, content):
         
         msg.attach(MIMEText(content, 'markdown'))
         
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_username, smtp_password)
-            server.send_message(msg)
+        server.send_message(msg)
         
         print('Email notification sent successfully')
         return True
@@ -97,24 +114,23 @@ def format_signin_result(result, username):
     """
     Format signin result as markdown content.
     """
-    content = f"### 账号: {username}\n"
+    lines = [f"### 账号: {username}"]
     
     if result.get('success'):
-        content += f"✅ **签到成功**\n"
-        content += f"- 状态: {result.get('info', '未知')}\n"
+        lines.append("✅ **签到成功**")
+        lines.append(f"- 状态: {result.get('info', '未知')}")
         if result.get('sign_count'):
-            content += f"- 连续签到: {result['sign_count']} 天\n"
-        if result.get('user_info'):
-            user_info = result['user_info']
-            if user_info.get('username'):
-                content += f"- 当前账户: {user_info['username']}\n"
-            if user_info.get('hz_coins'):
-                content += f"- 赫兹币余额: {user_info['hz_coins']}\n"
+            lines.append(f"- 连续签到: {result['sign_count']} 天")
+        user_info = result.get('user_info') or {}
+        if user_info.get('username'):
+            lines.append(f"- 当前账户: {user_info['username']}")
+        if user_info.get('hz_coins'):
+            lines.append(f"- 赫兹币余额: {user_info['hz_coins']}")
     else:
-        content += f"❌ **签到失败**\n"
-        content += f"- 错误信息: {result.get('error', '未知错误')}\n"
+        lines.append("❌ **签到失败**")
+        lines.append(f"- 错误信息: {result.get('error', '未知错误')}")
     
-    return content
+    return "\n".join(lines) + "\n"
 
 def send_notification(signin_results):
     """
@@ -135,26 +151,38 @@ def send_notification(signin_results):
     
     # Format content
     title = "NUEDC 自动签到结果"
-    content = ""
     
     print(f'Preparing notification for {len(signin_results)} accounts...')
     
-    for username, result in signin_results.items():
-        content += format_signin_result(result, username)
-        content += "\n---\n"
+    sections = [
+        format_signin_result(result, username)
+        for username, result in signin_results.items()
+    ]
+    content = "\n---\n".join(sections)
     
     print(f'Notification content prepared: {len(content)} characters')
     
     # Send notifications
     if feishu_webhook:
         print('Sending Feishu notification...')
-        success = send_feishu_notification(feishu_webhook, title, content)
+        success = send_feishu_notification(feishu_webhook, title, sections)
         print(f'Feishu notification sent: {success}')
     
     if email:
         print('Sending email notification...')
-        success = send_email_notification(email, title, content)
-        print(f'Email notification sent: {success}')
+        recipients = [addr.strip() for addr in email.split(',') if addr.strip()]
+        try:
+            server = open_smtp_connection()
+        except Exception as e:
+            print(f'Error connecting to SMTP server: {str(e)}')
+            server = None
+        
+        if server:
+            # One SMTP session for every recipient
+            with server:
+                for to_email in recipients:
+                    success = send_email_notification(server, to_email, title, content)
+                    print(f'Email notification sent to {to_email}: {success}')
     
     print('Notification process completed')
 
@@ -0,0 +1,376 @@
+"""
+NUEDC / myTI SSO client shared by signin.py (web and multi-account runs) and
+nuedc_hz_signin.py (command line).
+
+Login path:
+NUEDC -> myTI SSO -> login.ti.com -> NUEDC
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.cookiejar import MozillaCookieJar
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import orjson
+import requests
+from lxml import etree
+from lxml import html as lxml_html
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+NUEDC_HOME = "https://www.nuedc-training.com.cn/"
+NUEDC_SIGN_URL = "https://www.nuedc-training.com.cn/index/mall/sign"
+MYTI_LOGIN_PAGE = "https://www.nuedc-training.com.cn/index/login/myti_login"
+# Hosts only the SSO login talks to. www is left out: every path starts with a
+# request to it, so warming it up would not overlap anything.
+SSO_HOSTS = ("sp.nuedc-training.com.cn", "login.ti.com")
+
+# Retry transient 5xx / connection failures on a single hop instead of failing
+# the whole SSO chain; the last response is still returned when retries run out.
+# POSTs are left out: re-sending the TI password risks an account lockout and the
+# SAMLResponse is single-use. urllib3 still retries any method whose request
+# never reached the server (connect errors).
+HTTP_RETRY = Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=frozenset(["HEAD", "GET"]),
+    raise_on_status=False,
+)
+
+# NUEDC's sign-in day follows Beijing time, whatever the host's timezone is.
+SITE_TZ = timezone(timedelta(hours=8))
+
+# XPath equivalents of "a.loginMyti-btn1", "a#href" and
+# "form.paged-form-container, form[method='post']"
+MYTI_BUTTON_XPATH = "//a[contains(concat(' ', normalize-space(@class), ' '), ' loginMyti-btn1 ')]"
+SSO_LINK_XPATH = "//a[@id='href']"
+TI_LOGIN_FORM_XPATH = (
+    "(//form[contains(concat(' ', normalize-space(@class), ' '), ' paged-form-container ')"
+    " or translate(@method, 'POST', 'post') = 'post'])[1]"
+)
+# The auto-submit form carrying the SAMLResponse back to NUEDC
+SAML_FORM_XPATH = "(//form[.//input[@name='SAMLResponse']])[1]"
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/121.0.0.0 Safari/537.36"
+    ),
+    "Accept": (
+        "text/html,application/xhtml+xml,application/xml;"
+        "q=0.9,image/avif,image/webp,*/*;q=0.8"
+    ),
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
+
+
+@dataclass
+class SignResult:
+    status: int
+    info: str
+    sign_count: Optional[int]
+    raw: Dict
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (0, 1)
+
+    @property
+    def need_login(self) -> bool:
+        return self.status == 2
+
+
+class BindingRequiredError(RuntimeError):
+    """Raised when myTI login succeeds but NUEDC account binding is required."""
+
+
+def site_today() -> str:
+    """Current NUEDC sign-in day (Beijing time) as YYYY-MM-DD."""
+    return datetime.now(SITE_TZ).date().isoformat()
+
+
+def build_session(adapter: HTTPAdapter) -> Session:
+    """Session with the browser-like default headers, sending through ``adapter``."""
+    session = Session()
+    session.trust_env = False
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+class SsoSigner:
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        session: Session,
+        timeout: int = 30,
+        verbose: bool = False,
+        cookie_file: Optional[str] = None,
+    ) -> None:
+        self.username = username.strip()
+        self.password = password
+        self.timeout = timeout
+        self.verbose = verbose
+        self.cookie_file = cookie_file
+        self.session = session
+        # Cookies as last read from / written to cookie_file
+        self._saved_cookies: Optional[frozenset] = None
+        # Set once a sign request has succeeded with this session's cookies
+        self._cookies_verified = False
+        if cookie_file:
+            # The session reads and writes this jar directly, so load/save
+            # need no per-cookie copy.
+            self.session.cookies = MozillaCookieJar(cookie_file)
+        # None until the warm-up has been started
+        self._prewarm_threads: Optional[List[threading.Thread]] = None
+
+    def _start_prewarm(self) -> None:
+        # Resolve and TLS-connect to the SSO hosts in the background while the
+        # login is still talking to www. The connections land in the session's
+        # adapter pool; a throwaway Session keeps warm-up cookies out of the real
+        # jar. Only call this once it is known that the SSO login will run.
+        if self._prewarm_threads is not None:
+            return
+        warm = Session()
+        warm.trust_env = False
+        warm.mount("https://", self.session.get_adapter("https://"))
+        threads = [
+            threading.Thread(target=self._prewarm_host, args=(warm, host), daemon=True)
+            for host in SSO_HOSTS
+        ]
+        for t in threads:
+            t.start()
+        self._prewarm_threads = threads
+
+    @staticmethod
+    def _prewarm_host(session: Session, host: str) -> None:
+        try:
+            session.head(f"https://{host}/", timeout=3, allow_redirects=False)
+        except Exception:
+            pass
+
+    def _wait_prewarm(self) -> None:
+        # Bounded wait: a slow or retrying warm-up must not hold up the real
+        # requests, which share the same thread-safe connection pool.
+        deadline = time.monotonic() + 3
+        for t in self._prewarm_threads or ():
+            t.join(max(0.0, deadline - time.monotonic()))
+        self._prewarm_threads = []
+
+    def _log(self, message: str) -> None:
+        if self.verbose:
+            print(f"[debug] {message}")
+
+    def load_cookies(self) -> None:
+        if not self.cookie_file:
+            return
+        if not os.path.exists(self.cookie_file):
+            self._log(f"cookie file not found: {self.cookie_file}")
+            return
+
+        self.session.cookies.load(ignore_discard=True, ignore_expires=True)
+        self._saved_cookies = self._cookie_snapshot()
+        self._log(f"cookies loaded: {len(self.session.cookies)}")
+
+    def save_cookies(self) -> None:
+        if not self.cookie_file:
+            return
+        snapshot = self._cookie_snapshot()
+        if snapshot == self._saved_cookies:
+            # Keep the file's mtime current for mtime-based staleness checks;
+            # only cookies a sign request just accepted count as fresh.
+            if self._cookies_verified:
+                os.utime(self.cookie_file)
+            self._log("cookies unchanged, skipping save")
+            return
+        self.session.cookies.save(ignore_discard=True, ignore_expires=True)
+        self._saved_cookies = snapshot
+        self._log(f"cookies saved: {len(self.session.cookies)}")
+
+    def _cookie_snapshot(self) -> frozenset:
+        return frozenset(
+            (c.domain, c.path, c.name, c.value, c.expires) for c in self.session.cookies
+        )
+
+    @staticmethod
+    def _encoding(r: requests.Response) -> str:
+        # Without a charset requests would assume ISO-8859-1 for text/html, so
+        # fall back to UTF-8 (what both sites serve).
+        declared = "charset" in r.headers.get("Content-Type", "").lower()
+        return r.encoding if declared and r.encoding else "utf-8"
+
+    @classmethod
+    def _tree(cls, r: requests.Response) -> lxml_html.HtmlElement:
+        # The SSO pages only need a link or a form, so query lxml directly
+        # instead of wrapping every node in a BeautifulSoup object.
+        parser = lxml_html.HTMLParser(encoding=cls._encoding(r))
+        try:
+            return lxml_html.fromstring(r.content, parser=parser)
+        except etree.ParserError:  # empty body
+            return lxml_html.Element("html")
+
+    @staticmethod
+    def _extract_form(root: lxml_html.HtmlElement, xpath: str = "(//form)[1]") -> Tuple[str, Dict[str, str]]:
+        forms = root.xpath(xpath)
+        if not forms:
+            raise RuntimeError("Failed to find form in page.")
+        form = forms[0]
+
+        action = form.get("action")
+        if not action:
+            raise RuntimeError("Form action is missing.")
+
+        payload = {inp.get("name"): inp.get("value", "") for inp in form.xpath(".//input[@name != '']")}
+        return action, payload
+
+    def _request_sign(self) -> SignResult:
+        self._log("requesting sign endpoint")
+        r = self.session.get(
+            NUEDC_SIGN_URL,
+            timeout=self.timeout,
+            headers={
+                "Referer": NUEDC_HOME,
+                "X-Requested-With": "XMLHttpRequest",
+            },
+        )
+
+        try:
+            data = orjson.loads(r.content)
+        except orjson.JSONDecodeError:
+            if "index/login" in r.url:
+                return SignResult(status=2, info="need login", sign_count=None, raw={})
+            raise RuntimeError(
+                f"Unexpected sign response (status={r.status_code}, url={r.url})."
+            ) from None
+
+        status = int(data.get("status", -1))
+        info = str(data.get("info", ""))
+        extra = data.get("data")
+        count = extra.get("sign_count") if isinstance(extra, dict) else None
+        try:
+            sign_count = int(count) if count is not None else None
+        except (TypeError, ValueError):
+            sign_count = None
+
+        return SignResult(status=status, info=info, sign_count=sign_count, raw=data)
+
+    def _post(self, url: str, data: Dict[str, str], origin: str, referer: str, **kwargs) -> requests.Response:
+        # requests sets the form Content-Type itself for dict bodies, so only the
+        # per-hop Origin/Referer need to be sent.
+        return self.session.post(
+            url,
+            data=data,
+            timeout=self.timeout,
+            headers={"Origin": origin, "Referer": referer},
+            **kwargs,
+        )
+
+    def _follow_redirects(self, r: requests.Response, max_hops: int = 10) -> str:
+        # Walk the SSO callback redirects by hand, up to and including the page
+        # the chain lands on. That final GET is kept on purpose: the login relies
+        # on it to collect any session cookie NUEDC sets on the landing response
+        # rather than on the 3xx hops. Every body is drained so its keep-alive
+        # socket goes back to the pool for the next request.
+        for _ in range(max_hops):
+            r.content
+            if not r.is_redirect:
+                return r.url
+            next_url = urljoin(r.url, r.headers["Location"])
+            r = self.session.get(next_url, timeout=self.timeout, allow_redirects=False, stream=True)
+        r.close()
+        raise RuntimeError(f"Too many redirects in SSO callback, last url: {r.url}")
+
+    def login_via_ti(self) -> None:
+        self._start_prewarm()
+        self._log("opening myTI login entry page")
+        r = self.session.get(
+            MYTI_LOGIN_PAGE,
+            params={"referer": NUEDC_HOME},
+            timeout=self.timeout,
+        )
+        hrefs = self._tree(r).xpath(MYTI_BUTTON_XPATH + "/@href")
+        if not hrefs or not hrefs[0]:
+            raise RuntimeError("myTI login entry not found.")
+        sso_go = urljoin(r.url, hrefs[0])
+        self._log(f"sso_go: {sso_go}")
+
+        self._log("opening nuedc sso redirect page")
+        r = self.session.get(sso_go, timeout=self.timeout)
+        hrefs = self._tree(r).xpath(SSO_LINK_XPATH + "/@href")
+        if not hrefs or not hrefs[0]:
+            raise RuntimeError("SSO redirect link not found.")
+        sp_login = urljoin(r.url, hrefs[0])
+        self._log(f"sp login: {sp_login}")
+
+        self._log("posting SAMLRequest to TI")
+        # First request to the warmed-up hosts
+        self._wait_prewarm()
+        r = self.session.get(sp_login, timeout=self.timeout)
+        action, payload = self._extract_form(self._tree(r))
+        ti_sso_url = urljoin(r.url, action)
+        r = self._post(ti_sso_url, payload, origin="https://sp.nuedc-training.com.cn", referer=sp_login)
+
+        self._log("submitting TI username/password")
+        if b"SAMLResponse" not in r.content:
+            action, login_payload = self._extract_form(self._tree(r), TI_LOGIN_FORM_XPATH)
+            login_url = urljoin(r.url, action)
+            login_payload["pf.username"] = self.username.lower()
+            login_payload["pf.pass"] = self.password
+            login_payload["loginbutton"] = "login"
+
+            r = self._post(login_url, login_payload, origin="https://login.ti.com", referer=r.url)
+
+        self._log("consuming TI SAMLResponse to NUEDC")
+        if b"SAMLResponse" not in r.content:
+            raise RuntimeError(
+                "TI login did not return SAMLResponse. "
+                "Check username/password, or verify if extra challenge is required."
+            )
+
+        try:
+            action, saml_payload = self._extract_form(self._tree(r), SAML_FORM_XPATH)
+        except RuntimeError:
+            raise RuntimeError("SAMLResponse form is missing.") from None
+        saml_action = urljoin(r.url, action)
+
+        r = self._post(
+            saml_action,
+            saml_payload,
+            origin="https://login.ti.com",
+            referer=r.url,
+            allow_redirects=False,
+            stream=True,
+        )
+        final_url = self._follow_redirects(r)
+
+        host = urlparse(final_url).netloc
+        if "nuedc-training.com.cn" not in host:
+            raise RuntimeError(f"SSO callback not completed, current url: {final_url}")
+        if urlparse(final_url).path.startswith("/index/saml/binding"):
+            raise BindingRequiredError(
+                "myTI account is not bound to a NUEDC account yet. "
+                "Open https://www.nuedc-training.com.cn/index/saml/binding in a browser, "
+                "complete binding (bind existing account or register a new one), then rerun this script."
+            )
+
+    def _sign(self, assume_logged_out: bool = False) -> SignResult:
+        # A session known to be logged out skips the probe request and goes
+        # straight to SSO.
+        result = None if assume_logged_out else self._request_sign()
+        if result is None or result.need_login:
+            self._log("not logged in, running TI SSO login")
+            self.login_via_ti()
+            result = self._request_sign()
+        self._cookies_verified = result.ok
+        return result
@@ -5,42 +5,84 @@ Modified for web integration.
 """
 
 from __future__ import annotations
+import hashlib
+import hmac
 import os
-from dataclasses import dataclass
-from http.cookiejar import MozillaCookieJar
-from typing import Dict, Optional, Tuple
-from urllib.parse import urljoin, urlparse
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional, Tuple
+import orjson
 import requests
+import soupsieve as sv
 from bs4 import BeautifulSoup
 from requests import Session
-from requests.cookies import create_cookie
-
-NUEDC_HOME = "https://www.nuedc-training.com.cn/"
-NUEDC_SIGN_URL = "https://www.nuedc-training.com.cn/index/mall/sign"
-MYTI_LOGIN_PAGE = "https://www.nuedc-training.com.cn/index/login/myti_login"
-
-
-@dataclass
-class SignResult:
-    status: int
-    info: str
-    sign_count: Optional[int]
-    raw: Dict
-
-    @property
-    def ok(self) -> bool:
-        return self.status in (0, 1)
-
-    @property
-    def need_login(self) -> bool:
-        return self.status == 2
-
-
-class BindingRequiredError(RuntimeError):
-    """Raised when myTI login succeeds but NUEDC account binding is required."""
-
-
-class NuedcHzSigner:
+from requests.adapters import HTTPAdapter
+
+from nuedc_sso import (
+    HTTP_RETRY,
+    NUEDC_HOME,
+    BindingRequiredError,
+    SignResult,
+    SsoSigner,
+    build_session,
+    site_today,
+)
+
+_HZ_RE = re.compile("赫兹币")
+_DIGITS_RE = re.compile(r"\d+")
+_HZ_CLASS_RE = re.compile("coin|hz|balance", re.IGNORECASE)
+_NUMBER_TAGS = frozenset(("span", "div", "p", "b", "strong"))
+# Candidate selectors for the username and the Hz coin balance, compiled once
+USERNAME_SELECTORS = [
+    sv.compile(selector)
+    for selector in (".user-info .name", ".username", ".user-name", "#username", ".user span")
+]
+HZ_SELECTORS = [
+    sv.compile(selector)
+    for selector in (".hz-coin .num", ".hz-num", ".coin-num", "#hz-coin", ".user-info .coin")
+]
+
+# Connection pool shared by every signer session, so accounts signed in from the
+# same process reuse TLS connections. Cookies still live on each Session.
+# One pool per host of the SSO chain (www/sp.nuedc-training, login.ti.com, ...).
+_HTTP_ADAPTER = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=HTTP_RETRY)
+
+# Verbose runs dump the home page into this directory, one uniquely named
+# owner-only file per run; only the newest DEBUG_PAGE_KEEP dumps are kept.
+DEBUG_PAGE_DIR = "debug_pages"
+DEBUG_PAGE_KEEP = 5
+
+# Successful results of the current day, persisted so cron restarts can skip SSO.
+# The file is only read and written when SIGNIN_CACHE_SECRET is set: its keys are
+# HMACs of the credentials under that secret. Without it the keys use a random
+# per-process secret and the cache stays in memory.
+RESULT_CACHE_FILE = ".signin_cache.json"
+_CACHE_SECRET = os.environ.get("SIGNIN_CACHE_SECRET", "").encode("utf-8")
+_KEY_SECRET = _CACHE_SECRET or os.urandom(32)
+_RESULT_CACHE_LOCK = threading.Lock()
+_result_cache: Optional[Dict] = None
+
+# One Session per account, kept across run_signin calls so NUEDC login cookies
+# survive between runs. Only sessions that signed in successfully are pooled,
+# least recently used first out. Each one comes with a lock, since a Session
+# must not run two SSO chains at once.
+SESSION_POOL_SIZE = 32
+_SESSION_POOL: OrderedDict[str, Tuple[Session, threading.Lock]] = OrderedDict()
+_SESSION_POOL_LOCK = threading.Lock()
+
+# Per account: conditional-request headers of the last home page fetch and the
+# user info parsed from it, reused when the server answers 304 Not Modified.
+# Memory only, so it is used by long-lived processes (the web app) alone; see
+# revalidate_home.
+_HOME_CACHE: OrderedDict[str, Tuple[Dict[str, str], Dict]] = OrderedDict()
+_HOME_CACHE_LOCK = threading.Lock()
+
+
+class NuedcHzSigner(SsoSigner):
     def __init__(
         self,
         username: str,
@@ -48,233 +90,99 @@ class NuedcHzSigner:
         timeout: int = 30,
         verbose: bool = False,
         cookie_file: Optional[str] = None,
+        session: Optional[Session] = None,
+        revalidate_home: bool = False,
     ) -> None:
-        self.username = username.strip()
-        self.password = password
-        self.timeout = timeout
-        self.verbose = verbose
-        self.cookie_file = cookie_file
-
-        self.session = Session()
-        self.session.trust_env = False
-        self.session.headers.update(
-            {
-                "User-Agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/121.0.0.0 Safari/537.36"
-                ),
-                "Accept": (
-                    "text/html,application/xhtml+xml,application/xml;"
-                    "q=0.9,image/avif,image/webp,*/*;q=0.8"
-                ),
-                "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            }
+        pooled = session is not None and not cookie_file
+        super().__init__(
+            username,
+            password,
+            session=session if pooled else build_session(_HTTP_ADAPTER),
+            timeout=timeout,
+            verbose=verbose,
+            cookie_file=cookie_file,
         )
+        self._key = _account_key(self.username, self.password)
+        self.revalidate_home = revalidate_home
 
-    def _log(self, message: str) -> None:
-        if self.verbose:
-            print(f"[debug] {message}")
+        # A fresh session has no cookies, so run_signin goes straight to the SSO
+        # login; warm its hosts while the signer is being set up. Pooled and
+        # cookie-file sessions may still be logged in and leave it to login_via_ti.
+        if session is None and not cookie_file:
+            self._start_prewarm()
 
-    def load_cookies(self) -> None:
-        if not self.cookie_file:
-            return
-        if not os.path.exists(self.cookie_file):
-            self._log(f"cookie file not found: {self.cookie_file}")
-            return
-
-        jar = MozillaCookieJar(self.cookie_file)
-        jar.load(ignore_discard=True, ignore_expires=True)
-        for c in jar:
-            self.session.cookies.set_cookie(
-                create_cookie(
-                    name=c.name,
-                    value=c.value,
-                    domain=c.domain,
-                    path=c.path,
-                    secure=c.secure,
-                    expires=c.expires,
-                )
-            )
-        self._log(f"cookies loaded: {len(jar)}")
-
-    def save_cookies(self) -> None:
-        if not self.cookie_file:
-            return
-        jar = MozillaCookieJar(self.cookie_file)
-        for c in self.session.cookies:
-            jar.set_cookie(c)
-        jar.save(ignore_discard=True, ignore_expires=True)
-        self._log(f"cookies saved: {len(jar)}")
+    @classmethod
+    def _soup(cls, r: requests.Response) -> BeautifulSoup:
+        # Hand the raw bytes to the parser with the declared charset so bs4 skips
+        # its encoding detection.
+        return BeautifulSoup(r.content, "lxml", from_encoding=cls._encoding(r))
 
     @staticmethod
-    def _extract_form(soup: BeautifulSoup, selector: Optional[str] = None) -> Tuple[str, Dict[str, str]]:
-        form = soup.select_one(selector) if selector else soup.find("form")
-        if not form:
-            raise RuntimeError("Failed to find form in page.")
-
-        action = form.get("action")
-        if not action:
-            raise RuntimeError("Form action is missing.")
-
-        payload: Dict[str, str] = {}
-        for inp in form.find_all("input"):
-            name = inp.get("name")
-            if not name:
-                continue
-            payload[name] = inp.get("value", "")
-        return action, payload
-
-    def _request_sign(self) -> SignResult:
-        self._log("requesting sign endpoint")
-        r = self.session.get(
-            NUEDC_SIGN_URL,
-            timeout=self.timeout,
-            headers={
-                "Referer": NUEDC_HOME,
-                "X-Requested-With": "XMLHttpRequest",
-            },
-        )
+    def _first_number(container) -> Optional[int]:
+        # descendants is a lazy iterator, so the scan stops at the first matching
+        # tag instead of materialising every candidate with find_all().
+        for elem in container.descendants:
+            if getattr(elem, "name", None) in _NUMBER_TAGS:
+                m = _DIGITS_RE.search(elem.get_text())
+                if m:
+                    return int(m.group())
+        return None
 
-        try:
-            data = r.json()
-        except Exception:
-            if "index/login" in r.url:
-                return SignResult(status=2, info="need login", sign_count=None, raw={})
-            raise RuntimeError(
-                f"Unexpected sign response (status={r.status_code}, url={r.url})."
-            ) from None
-
-        status = int(data.get("status", -1))
-        info = str(data.get("info", ""))
-        sign_count = None
-        if isinstance(data.get("data"), dict):
-            count = data["data"].get("sign_count")
-            if count is not None:
-                try:
-                    sign_count = int(count)
-                except Exception:
-                    sign_count = None
-
-        return SignResult(status=status, info=info, sign_count=sign_count, raw=data)
-
-    def login_via_ti(self) -> None:
-        self._log("opening myTI login entry page")
-        r = self.session.get(
-            MYTI_LOGIN_PAGE,
-            params={"referer": NUEDC_HOME},
-            timeout=self.timeout,
-        )
-        soup = BeautifulSoup(r.text, "html.parser")
-        myti_btn = soup.select_one("a.loginMyti-btn1")
-        if not myti_btn or not myti_btn.get("href"):
-            raise RuntimeError("myTI login entry not found.")
-        sso_go = urljoin(r.url, myti_btn["href"])
-        self._log(f"sso_go: {sso_go}")
-
-        self._log("opening nuedc sso redirect page")
-        r = self.session.get(sso_go, timeout=self.timeout)
-        soup = BeautifulSoup(r.text, "html.parser")
-        auto_link = soup.select_one("a#href")
-        if not auto_link or not auto_link.get("href"):
-            raise RuntimeError("SSO redirect link not found.")
-        sp_login = urljoin(r.url, auto_link["href"])
-        self._log(f"sp login: {sp_login}")
-
-        self._log("posting SAMLRequest to TI")
-        r = self.session.get(sp_login, timeout=self.timeout)
-        soup = BeautifulSoup(r.text, "html.parser")
-        action, payload = self._extract_form(soup)
-        ti_sso_url = urljoin(r.url, action)
-        r = self.session.post(
-            ti_sso_url,
-            data=payload,
-            timeout=self.timeout,
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Origin": "https://sp.nuedc-training.com.cn",
-                "Referer": sp_login,
-            },
-        )
+    def get_user_info(self) -> Dict:
+        """
+        获取用户信息和赫兹币余额
+        """
+        self._log("getting user info and Hz coins")
+        if not self.revalidate_home:
+            r = self.session.get(NUEDC_HOME, timeout=self.timeout)
+            return self._parse_user_info(r)
 
-        self._log("submitting TI username/password")
-        if "SAMLResponse" not in r.text:
-            soup = BeautifulSoup(r.text, "html.parser")
-            action, login_payload = self._extract_form(
-                soup, "form.paged-form-container, form[method='post']"
-            )
-            login_url = urljoin(r.url, action)
-            login_payload["pf.username"] = self.username.lower()
-            login_payload["pf.pass"] = self.password
-            login_payload["loginbutton"] = "login"
-
-            r = self.session.post(
-                login_url,
-                data=login_payload,
-                timeout=self.timeout,
-                allow_redirects=True,
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded",
-                    "Origin": "https://login.ti.com",
-                    "Referer": r.url,
-                },
-            )
-
-        self._log("consuming TI SAMLResponse to NUEDC")
-        if "SAMLResponse" not in r.text:
-            raise RuntimeError(
-                "TI login did not return SAMLResponse. "
-                "Check username/password, or verify if extra challenge is required."
-            )
-
-        soup = BeautifulSoup(r.text, "html.parser")
-        saml_form = soup.find("form")
-        if not saml_form or not saml_form.get("action"):
-            raise RuntimeError("SAMLResponse form is missing.")
-
-        saml_action = urljoin(r.url, saml_form["action"])
-        saml_payload: Dict[str, str] = {}
-        for inp in saml_form.find_all("input"):
-            name = inp.get("name")
-            if not name:
-                continue
-            saml_payload[name] = inp.get("value", "")
-
-        r = self.session.post(
-            saml_action,
-            data=saml_payload,
-            timeout=self.timeout,
-            allow_redirects=True,
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Origin": "https://login.ti.com",
-                "Referer": r.url,
-            },
+        with _HOME_CACHE_LOCK:
+            cached = _HOME_CACHE.get(self._key)
+        r = self.session.get(
+            NUEDC_HOME, timeout=self.timeout, headers=cached[0] if cached else None
         )
+        if r.status_code == 304 and cached:
+            self._log("home page not modified, reusing cached user info")
+            return dict(cached[1])
+
+        user_info = self._parse_user_info(r)
+
+        validators = {}
+        if r.headers.get("ETag"):
+            validators["If-None-Match"] = r.headers["ETag"]
+        if r.headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = r.headers["Last-Modified"]
+        if validators:
+            with _HOME_CACHE_LOCK:
+                _lru_put(_HOME_CACHE, self._key, (validators, dict(user_info)))
+        return user_info
 
-        host = urlparse(r.url).netloc
-        if "nuedc-training.com.cn" not in host:
-            raise RuntimeError(f"SSO callback not completed, current url: {r.url}")
-        if urlparse(r.url).path.startswith("/index/saml/binding"):
-            raise BindingRequiredError(
-                "myTI account is not bound to a NUEDC account yet. "
-                "Open https://www.nuedc-training.com.cn/index/saml/binding in a browser, "
-                "complete binding (bind existing account or register a new one), then rerun this script."
-            )
+    def _dump_page(self, r: requests.Response) -> None:
+        """
+        把页面保存到 DEBUG_PAGE_DIR 下的独立文件，保存失败只记录日志，不影响签到
+        """
+        try:
+            os.makedirs(DEBUG_PAGE_DIR, mode=0o700, exist_ok=True)
+            # mkstemp picks a unique name and creates the file with mode 0600
+            fd, path = tempfile.mkstemp(prefix="nuedc_page_", suffix=".html", dir=DEBUG_PAGE_DIR)
+            with os.fdopen(fd, "wb") as f:
+                f.write(r.content)
+            _prune_debug_pages()
+        except OSError as e:
+            self._log(f"failed to save page content: {e}")
+            return
+        self._log(f"page content saved to {os.path.abspath(path)} for debugging")
 
-    def get_user_info(self) -> Dict:
+    def _parse_user_info(self, r: requests.Response) -> Dict:
         """
-        获取用户信息和赫兹币余额
+        从首页响应中解析用户名和赫兹币余额
         """
-        self._log("getting user info and Hz coins")
-        r = self.session.get(NUEDC_HOME, timeout=self.timeout)
-        
-        # 保存页面内容到临时文件，方便调试
-        with open("temp_page.html", "w", encoding="utf-8") as f:
-            f.write(r.text)
-        self._log("page content saved to temp_page.html for debugging")
+        # 详细模式下保存页面内容，方便调试
+        if self.verbose:
+            self._dump_page(r)
         
-        soup = BeautifulSoup(r.text, "html.parser")
+        soup = self._soup(r)
         
         # 查找用户信息和赫兹币余额
         user_info = {
@@ -284,110 +192,170 @@ class NuedcHzSigner:
         
         # 尝试从页面中提取用户名
         # 尝试多种可能的选择器
-        username_selectors = [
-            ".user-info .name",
-            ".username",
-            ".user-name",
-            "#username",
-            ".user span"
-        ]
-        
-        for selector in username_selectors:
-            username_elem = soup.select_one(selector)
+        for selector in USERNAME_SELECTORS:
+            username_elem = selector.select_one(soup)
             if username_elem:
                 user_info["username"] = username_elem.text.strip()
-                self._log(f"found username using selector '{selector}': {user_info['username']}")
+                self._log(f"found username using selector '{selector.pattern}': {user_info['username']}")
                 break
         
         # 尝试从页面中提取赫兹币余额
         # 方法1: 直接查找包含赫兹币的文本
-        hz_texts = soup.find_all(text=lambda text: text and "赫兹币" in text)
+        hz_texts = soup.find_all(string=_HZ_RE)
         self._log(f"found {len(hz_texts)} elements containing '赫兹币'")
         
         for hz_text in hz_texts:
-            # 查找包含此文本的元素
-            hz_container = hz_text.parent
-            # 查找容器内所有可能包含数字的元素
-            for elem in hz_container.find_all(['span', 'div', 'p', 'b', 'strong']):
-                text = elem.text.strip()
-                # 提取数字
-                import re
-                numbers = re.findall(r'\d+', text)
-                if numbers:
-                    try:
-                        hz_coins = int(numbers[0])
-                        user_info["hz_coins"] = hz_coins
-                        self._log(f"found Hz coins: {hz_coins} in element: {elem}")
-                        return user_info
-                    except Exception as e:
-                        self._log(f"error parsing Hz coins: {e}")
+            # 在包含此文本的元素内查找第一个带数字的子元素
+            hz_coins = self._first_number(hz_text.parent)
+            if hz_coins is not None:
+                user_info["hz_coins"] = hz_coins
+                self._log(f"found Hz coins: {hz_coins} near '{hz_text.strip()}'")
+                return user_info
         
         # 方法2: 尝试常见的赫兹币选择器
-        hz_selectors = [
-            ".hz-coin .num",
-            ".hz-num",
-            ".coin-num",
-            "#hz-coin",
-            ".user-info .coin"
-        ]
-        
-        for selector in hz_selectors:
-            hz_elem = soup.select_one(selector)
+        for selector in HZ_SELECTORS:
+            hz_elem = selector.select_one(soup)
             if hz_elem:
-                try:
-                    text = hz_elem.text.strip()
-                    import re
-                    numbers = re.findall(r'\d+', text)
-                    if numbers:
-                        hz_coins = int(numbers[0])
-                        user_info["hz_coins"] = hz_coins
-                        self._log(f"found Hz coins using selector '{selector}': {hz_coins}")
-                        return user_info
-                except Exception as e:
-                    self._log(f"error with selector '{selector}': {e}")
+                numbers = _DIGITS_RE.findall(hz_elem.text)
+                if numbers:
+                    hz_coins = int(numbers[0])
+                    user_info["hz_coins"] = hz_coins
+                    self._log(f"found Hz coins using selector '{selector.pattern}': {hz_coins}")
+                    return user_info
         
-        # 方法3: 全局搜索数字，尝试找到可能的赫兹币余额
-        all_text = soup.get_text()
-        import re
-        all_numbers = re.findall(r'\d+', all_text)
-        # 查找较大的数字，可能是赫兹币余额
-        large_numbers = [int(num) for num in all_numbers if int(num) > 0]
-        if large_numbers:
-            # 取最大的几个数字作为候选
-            large_numbers.sort(reverse=True)
-            # 假设赫兹币余额是较大的数字之一
-            for num in large_numbers[:5]:  # 检查前5个最大的数字
-                user_info["hz_coins"] = num
-                self._log(f"guessing Hz coins as: {num}")
-                break
+        # 方法3: 只检查第一个类名像赫兹币/余额的元素，不再扫描整页文本
+        hz_elem = soup.find(class_=_HZ_CLASS_RE)
+        if hz_elem:
+            m = _DIGITS_RE.search(hz_elem.get_text())
+            if m:
+                user_info["hz_coins"] = int(m.group())
+                self._log(f"found Hz coins in element with class {hz_elem.get('class')}: {user_info['hz_coins']}")
+                return user_info
         
         self._log(f"final user info: {user_info}")
         return user_info
 
-    def sign(self) -> Tuple[SignResult, Dict]:
-        result = self._request_sign()
-        if not result.need_login:
-            user_info = self.get_user_info()
-            return result, user_info
-
-        self._log("not logged in, running TI SSO login")
-        self.login_via_ti()
-        result = self._request_sign()
+    def sign(self, assume_logged_out: bool = False) -> Tuple[SignResult, Dict]:
+        result = self._sign(assume_logged_out)
+        if result.status == 1:
+            # The sign-in just changed the balance, so the cached page is stale
+            with _HOME_CACHE_LOCK:
+                _HOME_CACHE.pop(self._key, None)
         user_info = self.get_user_info()
         return result, user_info
 
 
-def run_signin(username: str, password: str, verbose: bool = False) -> Dict:
+def _account_key(username: str, password: str) -> str:
     """
-    运行签到并返回结果
+    会话池和结果缓存的键，包含密码摘要，避免只凭用户名就能复用别人的登录状态或签到结果
+    使用带密钥的 HMAC，缓存文件泄露时无法离线穷举密码
+    """
+    message = f"{username.strip()}\0{password}".encode("utf-8")
+    return hmac.new(_KEY_SECRET, message, hashlib.sha256).hexdigest()
+
+
+def _prune_debug_pages() -> None:
+    """
+    只保留最新的 DEBUG_PAGE_KEEP 份调试页面
+    """
+    dumps = []
+    for entry in os.scandir(DEBUG_PAGE_DIR):
+        if entry.name.startswith("nuedc_page_"):
+            try:
+                dumps.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                pass
+    dumps.sort()
+    for _, path in dumps[:-DEBUG_PAGE_KEEP]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _lru_put(cache: OrderedDict, key: str, value) -> None:
+    """
+    写入 LRU 缓存（调用方需持有对应的锁），超出 SESSION_POOL_SIZE 时淘汰最久未用的项
+    """
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > SESSION_POOL_SIZE:
+        cache.popitem(last=False)
+
+
+def _pooled_session(key: str) -> Optional[Tuple[Session, threading.Lock]]:
+    """
+    返回账号对应的常驻会话及其锁，没有时返回 None
+    """
+    with _SESSION_POOL_LOCK:
+        entry = _SESSION_POOL.get(key)
+        if entry is not None:
+            _SESSION_POOL.move_to_end(key)
+        return entry
+
+
+def _pool_session(key: str, session: Session) -> None:
+    """
+    把签到成功的会话放入会话池
+    """
+    with _SESSION_POOL_LOCK:
+        _lru_put(_SESSION_POOL, key, (session, threading.Lock()))
+
+
+def _today_results(today: str) -> Dict[str, Dict]:
+    """
+    返回当天的签到结果缓存（需持有 _RESULT_CACHE_LOCK），跨天自动失效
+    """
+    global _result_cache
+    if _result_cache is None and not _CACHE_SECRET:
+        _result_cache = {}
+    if _result_cache is None:
+        try:
+            with open(RESULT_CACHE_FILE, "rb") as f:
+                _result_cache = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            _result_cache = {}
+    if _result_cache.get("date") != today:
+        _result_cache = {"date": today, "results": {}}
+    return _result_cache["results"]
+
+
+def _store_result(key: str, today: str, result: Dict) -> None:
+    """
+    记录当天成功的签到结果并写回缓存文件
+    先写临时文件再替换，其他进程不会读到写了一半的文件
+    """
+    with _RESULT_CACHE_LOCK:
+        _today_results(today)[key] = result
+        if not _CACHE_SECRET:
+            return
+        tmp_file = f"{RESULT_CACHE_FILE}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "wb") as f:
+                f.write(orjson.dumps(_result_cache))
+            os.replace(tmp_file, RESULT_CACHE_FILE)
+        except OSError:
+            pass
+
+
+def _cached_result(key: str, today: str) -> Optional[Dict]:
+    """
+    返回账号当天成功的签到结果缓存
+    """
+    with _RESULT_CACHE_LOCK:
+        cached = _today_results(today).get(key)
+    if cached and cached.get("success"):
+        return dict(cached)
+    return None
+
+
+def _sign_response(signer: NuedcHzSigner) -> Dict:
+    """
+    运行一次签到并整理成返回给调用方的结果
     """
     try:
-        signer = NuedcHzSigner(
-            username=username,
-            password=password,
-            verbose=verbose
-        )
-        result, user_info = signer.sign()
+        # 没有任何 cookie 的会话（新建的会话）必然未登录，跳过探测请求
+        result, user_info = signer.sign(assume_logged_out=not signer.session.cookies)
         
         return {
             "success": result.ok,
@@ -409,3 +377,62 @@ def run_signin(username: str, password: str, verbose: bool = False) -> Dict:
             "error": str(e),
             "message": f"签到失败: {str(e)}"
         }
+
+
+def run_signin(
+    username: str,
+    password: str,
+    verbose: bool = False,
+    revalidate_home: bool = False,
+) -> Dict:
+    """
+    运行签到并返回结果
+    当天已成功签到的账号直接返回缓存结果，不再走 SSO 登录流程
+    revalidate_home 为 True 时用条件请求获取首页，只适合常驻进程（网页版）
+    """
+    key = _account_key(username, password)
+    today = site_today()
+    cached = _cached_result(key, today)
+    if cached:
+        return cached
+
+    pooled = _pooled_session(key)
+    session, lock = pooled if pooled else (None, nullcontext())
+    # 同一账号的并发请求在这里排队，避免两条 SSO 流程同时改写一个会话的 cookie
+    with lock:
+        if pooled:
+            # 排队期间前一个请求可能已经签到成功
+            cached = _cached_result(key, today)
+            if cached:
+                return cached
+        signer = NuedcHzSigner(
+            username=username,
+            password=password,
+            verbose=verbose,
+            session=session,
+            revalidate_home=revalidate_home,
+        )
+        response = _sign_response(signer)
+
+    if response["success"]:
+        # 登录失败的账号不占用会话池
+        if not pooled:
+            _pool_session(key, signer.session)
+        _store_result(key, today, response)
+    return response
+
+
+def run_signin_batch(
+    credentials: Iterable[Tuple[str, str]],
+    verbose: bool = False,
+    max_workers: int = 16,
+) -> List[Dict]:
+    """
+    并发地为多个账号运行签到，返回结果的顺序与 credentials 一致
+    """
+    credentials = list(credentials)
+    if not credentials:
+        return []
+    # 签到时间几乎都花在等待网络响应上，线程池让各账号的 SSO 请求相互重叠
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(credentials))) as pool:
+        return list(pool.map(lambda cred: run_signin(cred[0], cred[1], verbose), credentials))